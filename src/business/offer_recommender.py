@@ -5,6 +5,15 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Offers in rule priority order; the last entry is the fallback
+OFFER_CATEGORIES = [
+    "VIP exclusive event invitation",
+    "High-value win-back: 25% discount + Free Shipping",
+    "Welcome series: 10% off second purchase",
+    "Personalized 'we miss you' 15% discount",
+    "Standard monthly newsletter",
+]
+
 
 def load_all_customer_data(customer_features_path,
                            churn_model=None,
@@ -14,7 +23,7 @@ def load_all_customer_data(customer_features_path,
     Load customer features and optionally add churn probabilities and predicted LTV.
     Returns a unified DataFrame.
     """
-    customers = pd.read_csv(customer_features_path, index_col=0)
+    customers = pd.read_csv(customer_features_path, index_col=0, engine='pyarrow', dtype_backend='pyarrow')
     logger.info(f"Loaded {len(customers)} customers from {customer_features_path}")
 
     # Add churn probabilities if model provided
@@ -34,29 +43,32 @@ def load_all_customer_data(customer_features_path,
 
 
 def generate_offer_recommendations(customers_df):
-    """Logic based on risk (ChurnProb) and Value (LTV)."""
+    """
+    Logic based on risk (ChurnProb) and Value (LTV).
+    Returns a shallow copy of customers_df with a RecommendedOffer column; the other
+    columns share data with customers_df, so pass a copy if it will be modified in place.
+    """
+    segment = customers_df['Segment'].to_numpy()
+    churn = customers_df['ChurnProb'].to_numpy(dtype=np.float64, na_value=np.nan)
+    ltv = customers_df['HistoricalLTV'].to_numpy(dtype=np.float64, na_value=np.nan)
+    high_ltv_threshold = customers_df['HistoricalLTV'].median()
 
-    def offer_logic(row):
+    # Rules are evaluated in order; the first matching condition wins
+    conditions = [
         # High value/Low risk
-        if row['Segment'] == 'Champions' and row['ChurnProb'] < 0.3:
-            return "VIP exclusive event invitation"
-
+        (segment == 'Champions') & (churn < 0.3),
         # High value/High risk (The most critical group)
-        if row['HistoricalLTV'] > customers_df['HistoricalLTV'].median() and row['ChurnProb'] > 0.7:
-            return "High-value win-back: 25% discount + Free Shipping"
-
+        (ltv > high_ltv_threshold) & (churn > 0.7),
         # Low Frequency/New
-        if row['Segment'] == 'New':
-            return "Welcome series: 10% off second purchase"
-
+        segment == 'New',
         # General Retention
-        if row['ChurnProb'] > 0.5:
-            return "Personalized 'we miss you' 15% discount"
-
-        return "Standard monthly newsletter"
+        churn > 0.5,
+    ]
+    # Select int8 offer codes rather than strings; the categorical maps them back to labels
+    codes = np.select(conditions, np.arange(len(conditions), dtype=np.int8), default=len(conditions))
 
-    customers = customers_df.copy()
-    customers['RecommendedOffer'] = customers.apply(offer_logic, axis=1)
+    customers = customers_df.copy(deep=False)
+    customers['RecommendedOffer'] = pd.Categorical.from_codes(codes, categories=OFFER_CATEGORIES)
     return customers
 
 def create_marketing_campaign_summary(customers_with_offers):
@@ -64,7 +76,7 @@ def create_marketing_campaign_summary(customers_with_offers):
     Create a summary table for marketing teams: number of customers per offer type,
     expected reach, and estimated cost (if we assign hypothetical costs).
     """
-    summary = customers_with_offers.groupby('RecommendedOffer').agg(
+    summary = customers_with_offers.groupby('RecommendedOffer', observed=True).agg(
         CustomerCount=('CustomerID', 'count'),
         AvgLTV=('PredictedLTV_Next6Months', 'mean'),
         TotalHistoricalLTV=('HistoricalLTV', 'sum')
@@ -1,17 +1,45 @@
 import pandas as pd
 import logging
+from pathlib import Path
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-def load_raw_data(filepath: str) -> pd.DataFrame:
-    """Load raw Excel data."""
-    logger.info(f"Loading data from {filepath}")
-    df = pd.read_excel(filepath)
+
+def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast integer columns and store mixed object columns as strings so they are Parquet-safe."""
+    for col in df.select_dtypes('integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes('object').columns:
+        df[col] = df[col].astype('string')
+    return df
+
+
+def load_raw_data(filepath: str, columns=None) -> pd.DataFrame:
+    """
+    Load raw Excel data.
+    The first load writes a Parquet copy next to the Excel file; later loads read
+    that copy (only the requested columns) until the Excel file changes.
+    """
+    path = Path(filepath)
+    cache_path = path.with_suffix('.parquet')
+
+    if cache_path.exists() and cache_path.stat().st_mtime >= path.stat().st_mtime:
+        logger.info(f"Loading data from Parquet cache {cache_path}")
+        df = pd.read_parquet(cache_path, columns=columns, engine='pyarrow')
+    else:
+        logger.info(f"Loading data from {filepath}")
+        # Stable date sort so period filters downstream can binary-search InvoiceDate
+        df = _compact_dtypes(pd.read_excel(path)).sort_values('InvoiceDate', kind='mergesort', ignore_index=True)
+        df.to_parquet(cache_path, compression='zstd', engine='pyarrow', index=False)
+        logger.info(f"Cached raw data as Parquet at {cache_path}")
+        if columns is not None:
+            df = df[columns]
+
     logger.info(f"Data loaded with shape: {df.shape}")
     return df
 
 def save_processed_data(df: pd.DataFrame, filepath: str) -> None:
     """Save processed DataFrame to CSV."""
     logger.info(f"Saving processed data to {filepath}")
-    df.to_csv(filepath, index=False)
\ No newline at end of file
+    df.to_csv(filepath, index=False)
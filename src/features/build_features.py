@@ -6,6 +6,52 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+SEGMENT_CATEGORIES = ['Champions', 'Loyal', 'At Risk', 'New', 'Others']
+
+
+def _quantile_score(values: np.ndarray, reverse: bool = False, q: int = 5) -> np.ndarray:
+    """Score values 1..q by equal-sized quantile bins (same bins as qcut on rank(method='first'))."""
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[np.argsort(values, kind='stable')] = np.arange(1, len(values) + 1)
+    edges = np.quantile(ranks, np.linspace(0, 1, q + 1))[1:-1]
+    scores = np.searchsorted(edges, ranks, side='left').astype(np.int8) + 1
+    return q + 1 - scores if reverse else scores
+
+
+def aggregate_customer_transactions(df: pd.DataFrame,
+                                    customer_id: str = 'CustomerID',
+                                    date_col: str = 'InvoiceDate',
+                                    monetary_col: str = 'TotalPrice') -> pd.DataFrame:
+    """Per-customer purchase dates, order count and spend in a single groupby pass."""
+    return df.groupby(customer_id).agg(
+        FirstPurchase=(date_col, 'min'),
+        LastPurchase=(date_col, 'max'),
+        Frequency=(date_col, 'size'),
+        Monetary=(monetary_col, 'sum'),
+        AvgOrderValue=(monetary_col, 'mean')
+    )
+
+
+def score_rfm(rfm: pd.DataFrame) -> pd.DataFrame:
+    """Add R/F/M quintile scores, the combined RFM_Score and the Segment label to an RFM table."""
+    # Use rank-based quantiles to handle tied values in Frequency/Recency
+    for col, reverse in zip(['Recency', 'Frequency', 'Monetary'], [True, False, False]):
+        rfm[f'{col[0]}_Score'] = _quantile_score(rfm[col].to_numpy(), reverse=reverse)
+
+    r, f, m = (rfm[c].to_numpy() for c in ['R_Score', 'F_Score', 'M_Score'])
+    # Three-digit RFM key (e.g. 545) as an integer instead of concatenated strings
+    rfm['RFM_Score'] = r.astype(np.int16) * 100 + f.astype(np.int16) * 10 + m.astype(np.int16)
+
+    conditions = [
+        (r >= 4) & (f >= 4) & (m >= 4),
+        (r >= 3) & (f >= 3) & (m >= 3),
+        (r <= 2) & ((f >= 4) | (m >= 4)),
+        (r >= 4) & (f <= 2),
+    ]
+    segments = np.select(conditions, SEGMENT_CATEGORIES[:-1], default=SEGMENT_CATEGORIES[-1])
+    rfm['Segment'] = pd.Categorical(segments, categories=SEGMENT_CATEGORIES)
+    return rfm
+
 
 def calculate_rfm(df: pd.DataFrame,
                   customer_id: str = 'CustomerID',
@@ -16,32 +62,14 @@ def calculate_rfm(df: pd.DataFrame,
     if reference_date is None:
         reference_date = df[date_col].max() + timedelta(days=1)
 
-    rfm = df.groupby(customer_id).agg({
-        date_col: lambda x: (reference_date - x.max()).days,
-        customer_id: 'count',
-        monetary_col: 'sum'
-    }).rename(columns={
-        date_col: 'Recency',
-        customer_id: 'Frequency',
-        monetary_col: 'Monetary'
-    })
-
-    # Use rank-based quantiles to handle tied values in Frequency/Recency
-    for col, labels in zip(['Recency', 'Frequency', 'Monetary'], [[5, 4, 3, 2, 1], [1, 2, 3, 4, 5], [1, 2, 3, 4, 5]]):
-        rfm[f'{col[0]}_Score'] = pd.qcut(rfm[col].rank(method='first'), 5, labels=labels).astype(int)
-
-    rfm['RFM_Score'] = rfm['R_Score'].astype(str) + rfm['F_Score'].astype(str) + rfm['M_Score'].astype(str)
-
-    def assign_segment(row):
-        r, f, m = row['R_Score'], row['F_Score'], row['M_Score']
-        if r >= 4 and f >= 4 and m >= 4: return 'Champions'
-        if r >= 3 and f >= 3 and m >= 3: return 'Loyal'
-        if r <= 2 and (f >= 4 or m >= 4): return 'At Risk'
-        if r >= 4 and f <= 2: return 'New'
-        return 'Others'
-
-    rfm['Segment'] = rfm.apply(assign_segment, axis=1)
-    return rfm
+    g = df.groupby(customer_id)
+    last_purchase = g[date_col].max()
+    rfm = pd.concat([
+        (reference_date - last_purchase).dt.days.rename('Recency'),
+        g.size().rename('Frequency'),
+        g[monetary_col].sum().rename('Monetary')
+    ], axis=1)
+    return score_rfm(rfm)
 
 
 def add_purchase_frequency_features(df: pd.DataFrame, customer_id: str = 'CustomerID',
@@ -58,14 +86,29 @@ def add_purchase_frequency_features(df: pd.DataFrame, customer_id: str = 'Custom
 
 def build_all_features(df: pd.DataFrame, reference_date=None) -> pd.DataFrame:
     """Master function to run all feature engineering."""
-    rfm = calculate_rfm(df, reference_date=reference_date)
-    # Tenure and Average Order Value
-    tenure = df.groupby('CustomerID')['InvoiceDate'].agg(['min', 'max'])
-    tenure['TenureDays'] = (df['InvoiceDate'].max() - tenure['min']).dt.days
-    avg_order = df.groupby('CustomerID')['TotalPrice'].mean().rename('AvgOrderValue')
+    max_date = df['InvoiceDate'].max()
+    if reference_date is None:
+        reference_date = max_date + timedelta(days=1)
+
+    # RFM, Tenure and Average Order Value from one pass over the transactions
+    customers = aggregate_customer_transactions(df)
+    rfm = score_rfm(pd.DataFrame({
+        'Recency': (reference_date - customers['LastPurchase']).dt.days,
+        'Frequency': customers['Frequency'],
+        'Monetary': customers['Monetary']
+    }))
+    rfm['TenureDays'] = (max_date - customers['FirstPurchase']).dt.days
+    rfm['AvgOrderValue'] = customers['AvgOrderValue']
 
     # New Frequency Regularity Features
     freq_regularity = add_purchase_frequency_features(df)
 
-    features = rfm.join(tenure[['TenureDays']]).join(avg_order).join(freq_regularity)
-    return features
\ No newline at end of file
+    features = rfm.join(freq_regularity)
+    # Day counts and order counts fit in int32; monetary columns stay float64 to keep cents exact
+    return features.astype({
+        'Recency': 'int32',
+        'Frequency': 'int32',
+        'TenureDays': 'int32',
+        'AvgDaysBetweenOrders': 'float32',
+        'StdDaysBetweenOrders': 'float32'
+    })
\ No newline at end of file
@@ -1,4 +1,6 @@
 import pandas as pd
+import numpy as np
+import joblib
 from datetime import timedelta
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.ensemble import RandomForestClassifier
@@ -27,8 +29,8 @@ def prepare_split_data(df: pd.DataFrame, churn_window_days: int = 90):
     X = build_all_features(feature_data, reference_date=cutoff_date)
 
     # 2. Define Labels: 1 if customer did NOT appear in label_data, else 0
-    active_customers = label_data['CustomerID'].unique()
-    y = X.index.map(lambda x: 0 if x in active_customers else 1)
+    is_active = X.index.isin(label_data['CustomerID'].unique())
+    y = pd.Index(np.where(is_active, 0, 1))
 
     return X, y
 
@@ -37,15 +39,32 @@ def train_churn_model_robust(X, y):
     """Trains model using TimeSeriesSplit to ensure temporal validity."""
     # Use selected numeric features
     feature_cols = ['Recency', 'Frequency', 'Monetary', 'TenureDays', 'AvgOrderValue', 'StdDaysBetweenOrders']
-    X_train = X[feature_cols].fillna(0)
+    # RandomForest splits on float32, so hand it float32 directly
+    X_train = X[feature_cols].fillna(0).astype(np.float32)
 
     # TimeSeriesSplit is better for transaction data than random split
     tscv = TimeSeriesSplit(n_splits=5)
-    model = RandomForestClassifier(n_estimators=200, class_weight='balanced', random_state=42)
 
-    for train_index, test_index in tscv.split(X_train):
-        X_t, X_v = X_train.iloc[train_index], X_train.iloc[test_index]
-        y_t, y_v = y[train_index], y[test_index]
-        model.fit(X_t, y_t)
+    # Every fit replaces the previous one, so only the last (largest) training split shapes the model
+    train_index, _ = list(tscv.split(X_train))[-1]
+    y_t = np.asarray(y[train_index])
 
-    return model
\ No newline at end of file
+    # Same weights as class_weight='balanced', from a single bincount pass over the labels
+    counts = np.bincount(y_t, minlength=2)
+    class_weight = {label: len(y_t) / (2 * n) for label, n in enumerate(counts) if n}
+
+    model = RandomForestClassifier(n_estimators=200, class_weight=class_weight, n_jobs=-1, random_state=42)
+    model.fit(X_train.iloc[train_index], y_t)
+
+    return model
+
+
+def save_model(model, filepath='models/churn_model.pkl'):
+    joblib.dump(model, filepath, compress=('lz4', 3))
+    logger.info(f"Churn model saved to {filepath}")
+
+
+def load_model(filepath='models/churn_model.pkl'):
+    model = joblib.load(filepath)
+    logger.info(f"Churn model loaded from {filepath}")
+    return model
@@ -23,7 +23,12 @@ def calculate_historical_ltv(df_transactions,
     if period_days:
         end_date = df_transactions['InvoiceDate'].max()
         start_date = end_date - timedelta(days=period_days)
-        df_period = df_transactions[df_transactions['InvoiceDate'] >= start_date]
+        invoice_dates = df_transactions['InvoiceDate']
+        if invoice_dates.is_monotonic_increasing:
+            # Sorted by date: binary-search the first row in the period and slice from there
+            df_period = df_transactions.iloc[invoice_dates.searchsorted(start_date, side='left'):]
+        else:
+            df_period = df_transactions[invoice_dates >= start_date]
         logger.info(f"Calculating LTV over last {period_days} days ({start_date} to {end_date})")
     else:
         df_period = df_transactions
@@ -82,7 +87,8 @@ def train_predictive_ltv_model(X, y_ltv, model_type='random_forest', test_size=0
 
 
 def save_ltv_model(model, filepath='models/ltv_model.pkl'):
-    joblib.dump(model, filepath)
+    # LZ4 shrinks the pickled forest several-fold at little cost to load time
+    joblib.dump(model, filepath, compress=('lz4', 3))
     logger.info(f"LTV model saved to {filepath}")
 
 
@@ -1,43 +1,34 @@
-import sys
 from pathlib import Path
-sys.path.append(str(Path(__file__).parent))
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.io as pio
 import yaml
 import base64
 
-import plotly.graph_objects as go
-
-# ----------------------
-# Plotly theme: dark-glass (matches custom CSS)
-# ----------------------
-_CUSTOM_PLOTLY_TEMPLATE = go.layout.Template(
-    layout=dict(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font=dict(
-            color="#E8EEFF",
-            family="Inter, system-ui, -apple-system, Segoe UI, Roboto, sans-serif",
-        ),
-        legend=dict(bgcolor="rgba(0,0,0,0)"),
-        xaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        yaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        colorway=[
-            "#00E5FF", "#FF3D81", "#7C4DFF", "#00E676",
-            "#FFD54F", "#FF6D00", "#64FFDA", "#B388FF",
-        ],
-    )
-)
-pio.templates["customer360_dark"] = _CUSTOM_PLOTLY_TEMPLATE
-pio.templates.default = "customer360_dark"
-
 from utils import (
+    LARGE_UPLOAD_BYTES,
+    column_stats,
+    customer_data_key,
+    filter_customers,
+    get_css_text,
     load_customer_data,
     metric_card,
+    plotly_figure,
+    process_uploaded_chunks,
     process_uploaded_data,
+    segment_profiles,
+    segment_summary,
+    setup_plotly_theme,
+    to_csv_bytes,
+)
+
+setup_plotly_theme()
+
+# Sample upload file offered in the sidebar
+_TEMPLATE_CSV_BYTES = (
+    b"CustomerID,InvoiceDate,Quantity,UnitPrice\n"
+    b"123,2023-01-15,2,25.5\n"
+    b"123,2023-02-10,1,15.0\n"
 )
 
 st.set_page_config(page_title="Customer 360 Analytics", layout="wide")
@@ -47,8 +38,7 @@ with open(Path(__file__).parent / 'config.yaml') as f:
     config = yaml.safe_load(f)
 
 # Load custom CSS
-with open(Path(__file__).parent / 'assets' / 'style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+st.markdown(f"<style>{get_css_text()}</style>", unsafe_allow_html=True)
 
 # ======================
 # MAIN HEADER
@@ -129,55 +119,45 @@ with st.sidebar:
         """)
 
         # Template download
-        template_df = pd.DataFrame({
-            'CustomerID': [123, 123],
-            'InvoiceDate': ['2023-01-15', '2023-02-10'],
-            'Quantity': [2, 1],
-            'UnitPrice': [25.50, 15.00]
-        })
-        csv_template = template_df.to_csv(index=False).encode('utf-8')
         st.download_button(
             label="📎 Download CSV template",
-            data=csv_template,
+            data=_TEMPLATE_CSV_BYTES,
             file_name="upload_template.csv",
             mime='text/csv',
         )
 
     # --- FILE UPLOAD ---
     uploaded_file = st.file_uploader(
-        "Upload your own transaction data (CSV)",
-        type=['csv'],
-        help="Upload a CSV with columns: CustomerID, InvoiceDate, Quantity, UnitPrice (or TotalPrice)."
+        "Upload your own transaction data (CSV or Parquet)",
+        type=['csv', 'parquet'],
+        help="Upload a CSV or Parquet file with columns: CustomerID, InvoiceDate, Quantity, UnitPrice (or TotalPrice)."
     )
 
     if uploaded_file is not None:
         # Process the uploaded file
         with st.spinner("Processing your data..."):
-            raw_df = pd.read_csv(uploaded_file)
-            # Attempt to parse dates (adjust column name if needed)
-            date_col = 'InvoiceDate' if 'InvoiceDate' in raw_df.columns else 'Date'
-            if date_col in raw_df.columns:
-                raw_df[date_col] = pd.to_datetime(raw_df[date_col], errors='coerce')
+            if uploaded_file.size > LARGE_UPLOAD_BYTES and not uploaded_file.name.lower().endswith('.parquet'):
+                # Aggregate large CSVs chunk by chunk so memory is bounded by the number of customers
+                customer_df = process_uploaded_chunks(uploaded_file.file_id, uploaded_file)
             else:
-                st.error("Uploaded file must contain a date column (InvoiceDate or Date).")
-                st.stop()
-
-            # Process to customer-level features
-            customer_df = process_uploaded_data(raw_df)
+                customer_df = process_uploaded_data(uploaded_file.file_id, uploaded_file)
             if customer_df is not None:
                 st.session_state['customer_data'] = customer_df
                 st.session_state['data_source'] = "uploaded"
+                st.session_state['data_key'] = uploaded_file.file_id
                 st.success(f"✅ Data processed! {len(customer_df)} customers identified.")
             else:
                 st.error("Data processing failed. Check file format.")
                 st.stop()
     else:
-        # No upload: use default dataset
-        if 'customer_data' not in st.session_state or st.session_state.get('data_source') != "default":
+        # No upload: use default dataset, reloading it when the pipeline has rewritten it
+        default_key = customer_data_key()
+        if st.session_state.get('data_key') != default_key:
             default_df = load_customer_data()
             if not default_df.empty:
                 st.session_state['customer_data'] = default_df
                 st.session_state['data_source'] = "default"
+                st.session_state['data_key'] = default_key
 
     st.markdown("---")
     st.markdown("## 🎛️ Dashboard Controls")
@@ -189,19 +169,21 @@ with st.sidebar:
         st.stop()
 
     df = st.session_state['customer_data']
+    data_key = st.session_state['data_key']
+    stats = column_stats(data_key, df)
 
     with st.form(key="filter_form"):
         st.markdown("#### 🔍 Filters")
         segments = st.multiselect(
             "Customer Segment",
-            options=df['Segment'].unique(),
-            default=df['Segment'].unique()
+            options=stats['segments'],
+            default=stats['segments']
         )
         col1, col2 = st.columns(2)
         with col1:
-            min_ltv = st.number_input("Min LTV ($)", value=float(df['HistoricalLTV'].min()))
+            min_ltv = st.number_input("Min LTV ($)", value=stats['ltv_min'])
         with col2:
-            max_ltv = st.number_input("Max LTV ($)", value=float(df['HistoricalLTV'].max()))
+            max_ltv = st.number_input("Max LTV ($)", value=stats['ltv_max'])
         min_churn, max_churn = st.slider(
             "Churn Probability",
             min_value=0.0,
@@ -209,18 +191,16 @@ with st.sidebar:
             value=(0.0, 1.0)
         )
         st.markdown("---")
-        apply_filters = st.form_submit_button("Apply Filters", type="primary")
+        submitted = st.form_submit_button("Apply Filters", type="primary")
 
     st.markdown("---")
     if st.session_state.get('data_source') == "uploaded":
         st.info("📢 Using your uploaded data. Some predictions are rule-based (no pre-trained models).")
 
 # Apply filters
-filtered_df = df[
-    (df['Segment'].isin(segments)) &
-    (df['HistoricalLTV'].between(min_ltv, max_ltv)) &
-    (df['ChurnProb'].between(min_churn, max_churn))
-]
+filtered_df = filter_customers(data_key, df, tuple(segments), min_ltv, max_ltv, min_churn, max_churn)
+# Identifies filtered_df for the cached helpers below, which key on it instead of hashing the frame
+view_key = (data_key, tuple(segments), min_ltv, max_ltv, min_churn, max_churn)
 
 if filtered_df.empty:
     st.warning("⚠️ No customers match the selected filters. Adjust filters.")
@@ -239,7 +219,7 @@ with cols[0]:
 
 with cols[1]:
     avg_churn = filtered_df['ChurnProb'].mean()
-    overall_churn = df['ChurnProb'].mean()
+    overall_churn = stats['churn_mean']
     delta_churn = f"{avg_churn - overall_churn:+.2%}"
     st.markdown(metric_card(
         "Avg Churn Probability",
@@ -250,7 +230,7 @@ with cols[1]:
 
 with cols[2]:
     avg_ltv = filtered_df['HistoricalLTV'].mean()
-    overall_ltv = df['HistoricalLTV'].mean()
+    overall_ltv = stats['ltv_mean']
     delta_ltv = f"${avg_ltv - overall_ltv:+,.0f}"
     st.markdown(metric_card(
         "Avg Historical LTV",
@@ -261,7 +241,7 @@ with cols[2]:
 
 with cols[3]:
     avg_pred = filtered_df['PredictedLTV_Next6Months'].mean()
-    overall_pred = df['PredictedLTV_Next6Months'].mean()
+    overall_pred = stats['pred_ltv_mean']
     delta_pred = f"${avg_pred - overall_pred:+,.0f}"
     st.markdown(metric_card(
         "Avg Predicted LTV (6m)",
@@ -270,51 +250,71 @@ with cols[3]:
         help_text="vs overall average"
     ), unsafe_allow_html=True)
 
-# Tabs
-tab1, tab2, tab3 = st.tabs(["📊 Segment Overview", "📈 Risk & Value", "📋 Raw Data"])
-
-with tab1:
+def segment_overview(view_key, filtered_df, profiles):
     col_left, col_right = st.columns([1, 2])
     with col_left:
-        fig_seg = px.pie(
+        fig_seg = plotly_figure(
+            'pie',
+            view_key,
             filtered_df,
             names='Segment',
             hole=0.4,
             color_discrete_sequence=px.colors.qualitative.Pastel,
-            title="Segment Distribution"
+            title="Segment Distribution",
+            layout=dict(showlegend=False)
         )
-        fig_seg.update_layout(showlegend=False)
         st.plotly_chart(fig_seg, use_container_width=True)
     with col_right:
         st.subheader("Segment Profiles")
-        profiles = filtered_df.groupby('Segment')[['Recency', 'Frequency', 'Monetary']].mean().round(1)
         st.dataframe(profiles.style.background_gradient(cmap='Purples'), use_container_width=True)
 
-with tab2:
-    fig_scatter = px.scatter(
+def risk_and_value(view_key, filtered_df):
+    fig_scatter = plotly_figure(
+        'scatter',
+        view_key,
         filtered_df,
+        sample=True,
         x='ChurnProb',
         y='HistoricalLTV',
         color='Segment',
         size='PredictedLTV_Next6Months',
         hover_data=['CustomerID'],
+        render_mode='webgl',
         title='Customers by Churn Risk and Lifetime Value',
         color_discrete_sequence=px.colors.qualitative.Pastel,
-        labels={'ChurnProb': 'Churn Probability', 'HistoricalLTV': 'Historical LTV ($)'}
+        labels={'ChurnProb': 'Churn Probability', 'HistoricalLTV': 'Historical LTV ($)'},
+        layout=dict(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     )
-    fig_scatter.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     st.plotly_chart(fig_scatter, use_container_width=True)
 
-with tab3:
+# A fragment, so clicking the download button reruns only this tab
+@st.fragment
+def raw_data(view_key, filtered_df):
     st.dataframe(filtered_df, use_container_width=True)
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
     st.download_button(
         label="📥 Download data as CSV",
-        data=csv,
+        data=to_csv_bytes(view_key, filtered_df),
         file_name='filtered_customers.csv',
         mime='text/csv',
     )
 
+# Tabs
+tab1, tab2, tab3 = st.tabs(["📊 Segment Overview", "📈 Risk & Value", "📋 Raw Data"])
+
+with tab1:
+    if len(filtered_df) == len(df):
+        # Nothing filtered out: reuse the per-dataset summary instead of regrouping
+        profiles = segment_summary(data_key, df)[['Recency', 'Frequency', 'Monetary']].round(1)
+    else:
+        profiles = segment_profiles(view_key, filtered_df)
+    segment_overview(view_key, filtered_df, profiles)
+
+with tab2:
+    risk_and_value(view_key, filtered_df)
+
+with tab3:
+    raw_data(view_key, filtered_df)
+
 # Footer
 st.markdown("""
 <div class="footer">
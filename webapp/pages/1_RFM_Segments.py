@@ -1,44 +1,15 @@
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
-
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.io as pio
-
-import plotly.graph_objects as go
 
-# ----------------------
-# Plotly theme: dark-glass (matches custom CSS)
-# ----------------------
-_CUSTOM_PLOTLY_TEMPLATE = go.layout.Template(
-    layout=dict(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font=dict(
-            color="#E8EEFF",
-            family="Inter, system-ui, -apple-system, Segoe UI, Roboto, sans-serif",
-        ),
-        legend=dict(bgcolor="rgba(0,0,0,0)"),
-        xaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        yaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        colorway=[
-            "#00E5FF", "#FF3D81", "#7C4DFF", "#00E676",
-            "#FFD54F", "#FF6D00", "#64FFDA", "#B388FF",
-        ],
-    )
-)
-pio.templates["customer360_dark"] = _CUSTOM_PLOTLY_TEMPLATE
-pio.templates.default = "customer360_dark"
+from utils import column_options, load_customer_data, customer_data_key, plotly_figure, get_css_text, setup_plotly_theme, segment_profiles, segment_summary
 
-from utils import load_customer_data
+setup_plotly_theme()
 
 st.set_page_config(page_title="RFM Segments", layout="wide")
 
 # Load custom CSS
-with open(Path(__file__).parent.parent / 'assets' / 'style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+st.markdown(f"<style>{get_css_text()}</style>", unsafe_allow_html=True)
 
 st.markdown("""
 <div class="header">
@@ -48,6 +19,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 df = load_customer_data()
+data_key = customer_data_key()
 if df.empty:
     st.stop()
 
@@ -56,44 +28,53 @@ with st.sidebar:
     st.markdown("## 🎯 RFM Filters")
     selected_scores = st.multiselect(
         "RFM Score (3-digit)",
-        options=df['RFM_Score'].unique(),
+        options=column_options(data_key, df, 'RFM_Score'),
         default=[]
     )
 
 filtered_df = df if not selected_scores else df[df['RFM_Score'].isin(selected_scores)]
+view_key = (data_key, tuple(selected_scores))
 
 # Main content
 col1, col2 = st.columns([2, 1])
 
 with col1:
-    fig_hist = px.histogram(
+    fig_hist = plotly_figure(
+        'histogram',
+        view_key,
         filtered_df,
         x='RFM_Score',
         color='Segment',
         title='RFM Score Distribution',
         color_discrete_sequence=px.colors.qualitative.Pastel,
-        barmode='group'
+        barmode='group',
+        layout=dict(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     )
-    fig_hist.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     st.plotly_chart(fig_hist, use_container_width=True)
 
 with col2:
     st.subheader("Segment Profiles")
-    profiles = filtered_df.groupby('Segment')[['Recency', 'Frequency', 'Monetary']].mean().round(1)
+    if selected_scores:
+        profiles = segment_profiles(view_key, filtered_df)
+    else:
+        profiles = segment_summary(data_key, df)[['Recency', 'Frequency', 'Monetary']].round(1)
     st.dataframe(profiles.style.background_gradient(cmap='Purples'), use_container_width=True)
 
 st.subheader("3D View of RFM Space")
-fig_3d = px.scatter_3d(
+fig_3d = plotly_figure(
+    'scatter_3d',
+    view_key,
     filtered_df,
+    sample=True,
     x='Recency',
     y='Frequency',
     z='Monetary',
     color='Segment',
     hover_data=['CustomerID'],
     color_discrete_sequence=px.colors.qualitative.Pastel,
-    title='RFM Space'
+    title='RFM Space',
+    layout=dict(scene=dict(xaxis_title='Recency', yaxis_title='Frequency', zaxis_title='Monetary'))
 )
-fig_3d.update_layout(scene=dict(xaxis_title='Recency', yaxis_title='Frequency', zaxis_title='Monetary'))
 st.plotly_chart(fig_3d, use_container_width=True)
 
 # Footer
@@ -1,44 +1,15 @@
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
-
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.io as pio
-
-import plotly.graph_objects as go
 
-# ----------------------
-# Plotly theme: dark-glass (matches custom CSS)
-# ----------------------
-_CUSTOM_PLOTLY_TEMPLATE = go.layout.Template(
-    layout=dict(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font=dict(
-            color="#E8EEFF",
-            family="Inter, system-ui, -apple-system, Segoe UI, Roboto, sans-serif",
-        ),
-        legend=dict(bgcolor="rgba(0,0,0,0)"),
-        xaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        yaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        colorway=[
-            "#00E5FF", "#FF3D81", "#7C4DFF", "#00E676",
-            "#FFD54F", "#FF6D00", "#64FFDA", "#B388FF",
-        ],
-    )
-)
-pio.templates["customer360_dark"] = _CUSTOM_PLOTLY_TEMPLATE
-pio.templates.default = "customer360_dark"
+from utils import histogram_figure, load_customer_data, customer_data_key, plotly_figure, get_css_text, setup_plotly_theme
 
-from utils import load_customer_data
+setup_plotly_theme()
 
 st.set_page_config(page_title="LTV Analysis", layout="wide")
 
 # Load custom CSS
-with open(Path(__file__).parent.parent / 'assets' / 'style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+st.markdown(f"<style>{get_css_text()}</style>", unsafe_allow_html=True)
 
 st.markdown("""
 <div class="header">
@@ -48,30 +19,33 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 df = load_customer_data()
+data_key = customer_data_key()
 if df.empty:
     st.stop()
 
 # LTV distributions
 col1, col2 = st.columns(2)
 with col1:
-    fig_hist1 = px.histogram(
+    fig_hist1 = histogram_figure(
+        data_key,
         df,
-        x='HistoricalLTV',
+        'HistoricalLTV',
         nbins=50,
         title='Historical LTV Distribution',
-        color_discrete_sequence=['#00E5FF']
+        color='#00E5FF',
+        layout=dict(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     )
-    fig_hist1.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     st.plotly_chart(fig_hist1, use_container_width=True)
 with col2:
-    fig_hist2 = px.histogram(
+    fig_hist2 = histogram_figure(
+        data_key,
         df,
-        x='PredictedLTV_Next6Months',
+        'PredictedLTV_Next6Months',
         nbins=50,
         title='Predicted LTV (Next 6 Months)',
-        color_discrete_sequence=['#00E676']
+        color='#00E676',
+        layout=dict(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     )
-    fig_hist2.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
     st.plotly_chart(fig_hist2, use_container_width=True)
 
 # Top customers
@@ -88,15 +62,17 @@ st.dataframe(
 
 # LTV by segment
 st.subheader("LTV by Segment")
-fig_box = px.box(
+fig_box = plotly_figure(
+    'box',
+    (data_key,),
     df,
     x='Segment',
     y='HistoricalLTV',
     title='Historical LTV Distribution by Segment',
     color='Segment',
-    color_discrete_sequence=px.colors.qualitative.Pastel
+    color_discrete_sequence=px.colors.qualitative.Pastel,
+    layout=dict(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', showlegend=False)
 )
-fig_box.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', showlegend=False)
 st.plotly_chart(fig_box, use_container_width=True)
 
 # Footer
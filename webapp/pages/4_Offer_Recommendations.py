@@ -1,44 +1,13 @@
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
-
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.io as pio
-
-import plotly.graph_objects as go
 
-# ----------------------
-# Plotly theme: dark-glass (matches custom CSS)
-# ----------------------
-_CUSTOM_PLOTLY_TEMPLATE = go.layout.Template(
-    layout=dict(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font=dict(
-            color="#E8EEFF",
-            family="Inter, system-ui, -apple-system, Segoe UI, Roboto, sans-serif",
-        ),
-        legend=dict(bgcolor="rgba(0,0,0,0)"),
-        xaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        yaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
-        colorway=[
-            "#00E5FF", "#FF3D81", "#7C4DFF", "#00E676",
-            "#FFD54F", "#FF6D00", "#64FFDA", "#B388FF",
-        ],
-    )
-)
-pio.templates["customer360_dark"] = _CUSTOM_PLOTLY_TEMPLATE
-pio.templates.default = "customer360_dark"
+from utils import load_customer_data, customer_data_key, get_css_text, setup_plotly_theme, offer_bar_figure, offer_index, to_csv_bytes
 
-from utils import load_customer_data
+setup_plotly_theme()
 
 st.set_page_config(page_title="Offer Recommendations", layout="wide")
 
 # Load custom CSS
-with open(Path(__file__).parent.parent / 'assets' / 'style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+st.markdown(f"<style>{get_css_text()}</style>", unsafe_allow_html=True)
 
 st.markdown("""
 <div class="header">
@@ -48,37 +17,38 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 df = load_customer_data()
+data_key = customer_data_key()
 if df.empty:
     st.stop()
 
 # Offer distribution
 st.subheader("Recommended Offers Distribution")
-offer_counts = df['RecommendedOffer'].value_counts().reset_index()
-offer_counts.columns = ['Offer', 'Count']
-fig = px.bar(
-    offer_counts,
-    x='Count',
-    y='Offer',
-    orientation='h',
-    title='Number of Customers per Offer',
-    color='Count',
-    color_continuous_scale='Purples'
-)
-fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+fig = offer_bar_figure(df['RecommendedOffer'].value_counts())
 st.plotly_chart(fig, use_container_width=True)
 
 # Select offer to view customers
 st.subheader("Customers by Offer")
-selected_offer = st.selectbox("Select an offer to see customers", df['RecommendedOffer'].unique())
-offer_customers = df[df['RecommendedOffer'] == selected_offer][['CustomerID', 'Segment', 'ChurnProb', 'HistoricalLTV']]
+offers = offer_index(data_key, df)
+selected_offer = st.selectbox("Select an offer to see customers", list(offers))
+offer_customers = offers[selected_offer][['CustomerID', 'Segment', 'ChurnProb', 'HistoricalLTV']]
+# Only the riskiest rows go to the browser; the full list is available as a download
+shown_customers = offer_customers.nlargest(1000, 'ChurnProb')
+if len(offer_customers) > len(shown_customers):
+    st.caption(f"Showing the {len(shown_customers):,} highest-risk of {len(offer_customers):,} customers with this offer.")
 st.dataframe(
-    offer_customers,
+    shown_customers,
     use_container_width=True,
     column_config={
         "ChurnProb": st.column_config.ProgressColumn("Churn Risk", format="%.1f%%", min_value=0, max_value=1),
         "HistoricalLTV": st.column_config.NumberColumn("Historical LTV", format="$%.0f")
     }
 )
+st.download_button(
+    label="📥 Download full list as CSV",
+    data=to_csv_bytes((data_key, selected_offer), offer_customers),
+    file_name='offer_customers.csv',
+    mime='text/csv',
+)
 
 # Footer
 st.markdown("""
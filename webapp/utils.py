@@ -1,24 +1,144 @@
+import csv
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import joblib
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 import streamlit as st
 from pathlib import Path
 from datetime import timedelta
 
+# Uploads above this size are read and aggregated in chunks of UPLOAD_CHUNK_ROWS rows
+LARGE_UPLOAD_BYTES = 64 * 1024 * 1024
+UPLOAD_CHUNK_ROWS = 500_000
+
 # ======================
 # ORIGINAL FUNCTIONS (keep these)
 # ======================
 
-@st.cache_data(ttl=3600)
+# ----------------------
+# Plotly theme: dark-glass (matches custom CSS)
+# ----------------------
+def get_plotly_template():
+    """The dashboard's Plotly template."""
+    return go.layout.Template(
+        layout=dict(
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            font=dict(
+                color="#E8EEFF",
+                family="Inter, system-ui, -apple-system, Segoe UI, Roboto, sans-serif",
+            ),
+            legend=dict(bgcolor="rgba(0,0,0,0)"),
+            xaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
+            yaxis=dict(gridcolor="rgba(255,255,255,0.06)", zerolinecolor="rgba(255,255,255,0.12)"),
+            colorway=[
+                "#00E5FF", "#FF3D81", "#7C4DFF", "#00E676",
+                "#FFD54F", "#FF6D00", "#64FFDA", "#B388FF",
+            ],
+        )
+    )
+
+def setup_plotly_theme():
+    """Register the dashboard template and make it the default; the registry is per process, so this builds it once."""
+    if "customer360_dark" not in pio.templates:
+        pio.templates["customer360_dark"] = get_plotly_template()
+    pio.templates.default = "customer360_dark"
+
+@st.cache_resource(show_spinner=False)
+def get_css_text(path=Path(__file__).parent / 'assets' / 'style.css'):
+    """Contents of a stylesheet (the dashboard's style.css by default), read once per process."""
+    return Path(path).read_text()
+
+# Day/count columns fit in 32 bits; money and churn probabilities stay float64 so cents, exports
+# and the sidebar's float64 filter bounds behave exactly as in the source data
+_COMPACT_DTYPES = {
+    'Recency': 'int32',
+    'Frequency': 'int32',
+    'Monetary': 'float64',
+    'HistoricalLTV': 'float64',
+    'PredictedLTV_Next6Months': 'float64',
+    'ChurnProb': 'float64',
+}
+
+_CATEGORY_COLUMNS = ['Segment', 'RFM_Score', 'RecommendedOffer']
+
+def _downcast_customer_columns(df):
+    """Apply _COMPACT_DTYPES, then store any other integer (scores, day counts) in the smallest type that fits."""
+    df = df.astype({col: dtype for col, dtype in _COMPACT_DTYPES.items() if col in df.columns})
+    for col in df.columns.difference(list(_COMPACT_DTYPES), sort=False):
+        values = df[col]
+        if pd.api.types.is_integer_dtype(values.dtype) and not values.hasnans:
+            df[col] = pd.to_numeric(values.to_numpy(np.int64), downcast='integer')
+    return df
+
+_CUSTOMER_DATA_PATH = Path(__file__).parent.parent / 'data' / 'processed' / 'customers_with_offers.csv'
+# The pipeline (notebook 05) exports its own Parquet copy; the dashboard caches its CSV reads under a
+# separate name so the two writers never replace each other's file
+_PIPELINE_PARQUET_PATH = _CUSTOMER_DATA_PATH.with_suffix('.parquet')
+_DASHBOARD_PARQUET_PATH = _CUSTOMER_DATA_PATH.with_name('customers_with_offers.dashboard.parquet')
+
+def _customer_data_source():
+    """The file to read the customer table from: a Parquet copy at least as new as the CSV, else the CSV."""
+    data_mtime = _CUSTOMER_DATA_PATH.stat().st_mtime
+    for path in (_PIPELINE_PARQUET_PATH, _DASHBOARD_PARQUET_PATH):
+        if path.exists() and path.stat().st_mtime >= data_mtime:
+            return path, path.stat().st_mtime
+    return _CUSTOMER_DATA_PATH, data_mtime
+
+def customer_data_key():
+    """
+    Cache key for the bundled customer table, passed as data_key to the per-dataset helpers below.
+    It changes whenever the pipeline rewrites its CSV or Parquet export; the dashboard's own
+    Parquet cache is derived from the CSV and is left out.
+    """
+    csv_mtime, parquet_mtime = (
+        path.stat().st_mtime if path.exists() else None for path in (_CUSTOMER_DATA_PATH, _PIPELINE_PARQUET_PATH)
+    )
+    return f"default:{csv_mtime}:{parquet_mtime}"
+
 def load_customer_data():
     """Load the final customer dataset with offers."""
-    data_path = Path(__file__).parent.parent / 'data' / 'processed' / 'customers_with_offers.csv'
-    if not data_path.exists():
-        st.error(f"❌ Data file not found at {data_path}. Please run the pipeline first.")
+    if not _CUSTOMER_DATA_PATH.exists():
+        st.error(f"❌ Data file not found at {_CUSTOMER_DATA_PATH}. Please run the pipeline first.")
         return pd.DataFrame()
-    df = pd.read_csv(data_path)
-    df['CustomerID'] = df['CustomerID'].astype(str)
-    return df
+    return _read_customer_data(*_customer_data_source())
+
+# Persisted to disk so restarts and new workers skip parsing; the file mtime in the key
+# replaces a TTL (which persistent caches ignore) and picks up a re-run pipeline.
+@st.cache_data(persist="disk", max_entries=4, show_spinner=False)
+def _read_customer_data(source_path, source_mtime):
+    """
+    Reads a Parquet copy of the customer table, or parses the CSV and caches it as
+    customers_with_offers.dashboard.parquet for later loads.
+    """
+    if source_path.suffix == '.parquet':
+        df = pd.read_parquet(source_path, engine='pyarrow', dtype_backend='pyarrow', memory_map=True)
+        # pandas 'string' columns come back as large_string; match the CSV reader's Arrow strings
+        large_string = pd.ArrowDtype(pa.large_string())
+        df = df.astype({col: pd.ArrowDtype(pa.string()) for col, dtype in df.dtypes.items() if dtype == large_string})
+    else:
+        # Every named column: the pipeline's CSV also carries an unnamed index column, and its other
+        # columns vary between pipeline versions, so they are read from the header
+        with open(source_path, newline='') as f:
+            columns = [col for col in next(csv.reader(f)) if col]
+        # Parse straight into the final types so pyarrow skips inference for these columns
+        dtypes = {'CustomerID': pd.ArrowDtype(pa.string()), **_COMPACT_DTYPES}
+        dtypes.update(dict.fromkeys(_CATEGORY_COLUMNS, 'category'))
+        df = pd.read_csv(
+            source_path, engine='pyarrow', dtype_backend='pyarrow', usecols=columns,
+            dtype={col: dtype for col, dtype in dtypes.items() if col in columns},
+        )
+        try:
+            df.to_parquet(_DASHBOARD_PARQUET_PATH, compression='zstd', engine='pyarrow', index=False)
+        except OSError:
+            pass  # read-only deployment: keep serving from the CSV
+    # Parquet hands these back as Arrow types, so normalise both paths to the same dtypes
+    for col in _CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    return _downcast_customer_columns(df)
 
 @st.cache_resource
 def load_churn_model():
@@ -36,6 +156,183 @@ def load_ltv_model():
         return None
     return joblib.load(model_path)
 
+# Sidebar helpers are keyed on a data_key (an upload's file_id, or customer_data_key() for the
+# bundled table) rather than a hash of the whole table;
+# Streamlit skips hashing arguments whose name starts with an underscore. Per-view caches (one
+# entry per filter combination) also set max_entries, as the free-form LTV bounds are unbounded.
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def column_options(data_key, _df, column):
+    """Sorted distinct values of a column for a filter widget (read from the used categories when categorical)."""
+    values = _df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return sorted(values.cat.remove_unused_categories().cat.categories)
+    return sorted(values.dropna().unique())
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def column_stats(data_key, _df):
+    """Segment options, HistoricalLTV bounds and dataset-wide KPI averages."""
+    df = _df
+    return {
+        'segments': column_options(data_key, df, 'Segment'),
+        'ltv_min': float(df['HistoricalLTV'].min()),
+        'ltv_max': float(df['HistoricalLTV'].max()),
+        'churn_mean': float(df['ChurnProb'].mean()),
+        'ltv_mean': float(df['HistoricalLTV'].mean()),
+        'pred_ltv_mean': float(df['PredictedLTV_Next6Months'].mean()),
+    }
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def filter_arrays(data_key, _df):
+    """Read-only NumPy views of the filter columns, extracted once per dataset and shared across reruns."""
+    segment = pd.Categorical(_df['Segment'])
+    arrays = {
+        'segment_codes': np.asarray(segment.codes),
+        'segment_categories': segment.categories,
+        'ltv': _df['HistoricalLTV'].to_numpy(dtype=np.float64, na_value=np.nan),
+        'churn': _df['ChurnProb'].to_numpy(dtype=np.float64, na_value=np.nan),
+    }
+    for key in ('segment_codes', 'ltv', 'churn'):
+        arrays[key].setflags(write=False)
+    return arrays
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def offer_index(data_key, _df):
+    """Customers grouped by recommended offer (in order of first appearance), split once per dataset and shared across reruns."""
+    return dict(tuple(_df.groupby('RecommendedOffer', sort=False, observed=True)))
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def filter_customers(data_key, _df, segments, min_ltv, max_ltv, min_churn, max_churn):
+    """Return the customers matching the sidebar filters (cached per filter combination)."""
+    arrays = filter_arrays(data_key, _df)
+    ltv, churn = arrays['ltv'], arrays['churn']
+    codes = arrays['segment_categories'].get_indexer(list(segments))
+    # Build one boolean mask in place instead of combining a Series per comparison
+    mask = np.isin(arrays['segment_codes'], codes[codes >= 0])
+    mask &= ltv >= min_ltv
+    mask &= ltv <= max_ltv
+    mask &= churn >= min_churn
+    mask &= churn <= max_churn
+    return _df[mask]
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def segment_summary(data_key, _df):
+    """Per-segment customer count and mean RFM/LTV/churn over the whole dataset, computed once per dataset."""
+    return _df.groupby('Segment', observed=True).agg(
+        Customers=('CustomerID', 'size'),
+        Recency=('Recency', 'mean'),
+        Frequency=('Frequency', 'mean'),
+        Monetary=('Monetary', 'mean'),
+        HistoricalLTV=('HistoricalLTV', 'mean'),
+        PredictedLTV_Next6Months=('PredictedLTV_Next6Months', 'mean'),
+        ChurnProb=('ChurnProb', 'mean'),
+    )
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def segment_profiles(view_key, _df):
+    """
+    Mean Recency/Frequency/Monetary per segment of a filtered view (see to_csv_bytes for view_key),
+    skipping segments that have been filtered out.
+    """
+    return _df.groupby('Segment', observed=True)[['Recency', 'Frequency', 'Monetary']].mean().round(1)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def top_churn_risk(data_key, _df, threshold, limit=500):
+    """The `limit` riskiest customers above the churn threshold, plus how many customers are above it in total."""
+    at_risk = _df[_df['ChurnProb'] > threshold]
+    # nlargest only partially sorts, unlike sort_values over every at-risk customer
+    return at_risk.nlargest(limit, 'ChurnProb'), len(at_risk)
+
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False)
+def to_csv_bytes(view_key, _df):
+    """
+    Serialize a DataFrame to UTF-8 CSV bytes for st.download_button, cached per view_key:
+    a hashable tuple (data_key plus the filters applied) that identifies exactly the rows of _df.
+    """
+    return _df.to_csv(index=False).encode('utf-8')
+
+def sample_for_plot(df, n=10000):
+    """Sample about n rows, stratified by Segment, so large scatter plots stay light in the browser."""
+    if len(df) <= n:
+        return df
+    return df.groupby('Segment', observed=True).sample(frac=n / len(df), random_state=0).sort_index()
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def plotly_figure(kind, view_key, _df, sample=False, layout=None, **kwargs):
+    """
+    Build a plotly.express chart of the given kind (e.g. 'pie', 'scatter'), cached on view_key (which
+    identifies the rows of _df, see to_csv_bytes) and the chart arguments. sample=True plots
+    sample_for_plot(_df) instead of every row.
+    """
+    fig = getattr(px, kind)(sample_for_plot(_df) if sample else _df, **kwargs)
+    if layout:
+        fig.update_layout(**layout)
+    return fig
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def histogram_figure(data_key, _df, column, nbins=50, bin_range=None, title=None, color=None, layout=None):
+    """Bin a column server-side and draw it as one bar trace, so only the bin counts reach the browser."""
+    counts, edges = np.histogram(_df[column].dropna().to_numpy(), bins=nbins, range=bin_range)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), marker_color=color))
+    fig.update_layout(title=title, xaxis_title=column, yaxis_title='count', bargap=0)
+    if layout:
+        fig.update_layout(**layout)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def feature_importance_figure(importances, features, color):
+    """Horizontal bar chart of model feature importances, most important at the top."""
+    order = np.argsort(importances, kind='stable')
+    fig = go.Figure(go.Bar(
+        x=importances[order],
+        y=[features[i] for i in order],
+        orientation='h',
+        marker_color=color,
+    ))
+    fig.update_layout(
+        title='What Drives Churn?',
+        xaxis_title='Importance',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def roc_curve_figure():
+    """Illustrative ROC curve for the model page (the training pipeline does not save a real one yet)."""
+    fpr = np.linspace(0, 1, 100)
+    tpr = fpr ** 0.7  # dummy curve with AUC ≈ 0.85
+    fig = px.area(
+        x=fpr,
+        y=tpr,
+        title='ROC Curve (AUC ≈ 0.85)',
+        labels={'x': 'False Positive Rate', 'y': 'True Positive Rate'}
+    )
+    fig.add_shape(
+        type='line',
+        line=dict(dash='dash', color='grey'),
+        x0=0, x1=1, y0=0, y1=1
+    )
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+@st.cache_data(show_spinner=False)
+def offer_bar_figure(counts):
+    """Horizontal bar chart of customers per recommended offer, built from the (small) value counts."""
+    offer_counts = counts.reset_index()
+    offer_counts.columns = ['Offer', 'Count']
+    fig = px.bar(
+        offer_counts,
+        x='Count',
+        y='Offer',
+        orientation='h',
+        title='Number of Customers per Offer',
+        color='Count',
+        color_continuous_scale='Purples'
+    )
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
 def get_feature_columns():
     return ['Recency', 'Frequency', 'Monetary', 'TenureDays', 'AvgOrderValue']
 
@@ -57,130 +354,199 @@ def metric_card(title, value, delta=None, delta_color="normal", help_text=""):
 # ======================
 
 def clean_transaction_data(df):
-    """Basic cleaning: remove missing CustomerID, negative quantities/prices, create TotalPrice."""
+    """Basic cleaning: remove missing CustomerID, negative quantities/prices, parse InvoiceDate, create TotalPrice."""
     required = ['CustomerID', 'InvoiceDate']
     if not all(col in df.columns for col in required):
         st.error(f"Uploaded file must contain columns: {required}")
         return None
 
-    df_clean = df.copy()
-    df_clean.dropna(subset=['CustomerID'], inplace=True)
+    # If TotalPrice not present, create from Quantity and UnitPrice
+    if 'TotalPrice' in df.columns:
+        total_price = None
+        # Nullable/Arrow totals: missing values count as not positive, like the boolean filter they replace
+        positive = df['TotalPrice'].gt(0).to_numpy(dtype=bool, na_value=False)
+    elif 'Quantity' in df.columns and 'UnitPrice' in df.columns:
+        # Multiply the raw arrays: no index alignment, and nullable/Arrow columns become NaN-aware float64
+        total_price = (
+            df['Quantity'].to_numpy(dtype=np.float64, na_value=np.nan)
+            * df['UnitPrice'].to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+        positive = total_price > 0
+    else:
+        st.error("Need either 'TotalPrice' or both 'Quantity' and 'UnitPrice'.")
+        return None
+
+    # Remove missing CustomerIDs and negative or zero totals with a single row selection, which
+    # is the only full copy of the upload; the shallow copy just detaches it for the column writes
+    keep = df['CustomerID'].notna().to_numpy() & positive
+    df_clean = df[keep].copy(deep=False)
+    if total_price is not None:
+        df_clean['TotalPrice'] = total_price[keep]
     df_clean['CustomerID'] = df_clean['CustomerID'].astype(str)
 
-    # If TotalPrice not present, create from Quantity and UnitPrice
-    if 'TotalPrice' not in df_clean.columns:
-        if 'Quantity' in df_clean.columns and 'UnitPrice' in df_clean.columns:
-            df_clean['TotalPrice'] = df_clean['Quantity'] * df_clean['UnitPrice']
-        else:
-            st.error("Need either 'TotalPrice' or both 'Quantity' and 'UnitPrice'.")
-            return None
+    # Parse dates once, vectorized, so the per-customer aggregation works on datetime64 values
+    if not pd.api.types.is_datetime64_any_dtype(df_clean['InvoiceDate']):
+        df_clean['InvoiceDate'] = pd.to_datetime(df_clean['InvoiceDate'], errors='coerce', cache=True)
 
-    # Remove negative or zero quantities/prices (optional)
-    df_clean = df_clean[df_clean['TotalPrice'] > 0]
     return df_clean
 
-def compute_rfm(df, reference_date=None):
+def summarize_transactions(df):
+    """Per-customer first/last purchase date, transaction count and spend from cleaned transactions."""
+    return df.groupby('CustomerID').agg(
+        FirstPurchase=('InvoiceDate', 'min'),
+        LastPurchase=('InvoiceDate', 'max'),
+        Frequency=('InvoiceDate', 'size'),
+        Monetary=('TotalPrice', 'sum'),
+    )
+
+def combine_summaries(parts):
+    """Merge per-chunk customer summaries; a customer can appear in several chunks."""
+    return pd.concat(parts).groupby(level=0).agg(
+        FirstPurchase=('FirstPurchase', 'min'),
+        LastPurchase=('LastPurchase', 'max'),
+        Frequency=('Frequency', 'sum'),
+        Monetary=('Monetary', 'sum'),
+    )
+
+SEGMENT_CATEGORIES = ['Champions', 'Loyal', 'At Risk', 'New', 'Others']
+
+def _segment_lookup_table():
+    """SEGMENT_CATEGORIES code for every (R, F, M) score triple, indexed [r - 1, f - 1, m - 1]."""
+    r, f, m = np.indices((5, 5, 5)) + 1
+    # Segment mapping (simplified); np.select takes the first matching rule, like an if/elif chain
+    return np.select(
+        [
+            (r >= 4) & (f >= 4) & (m >= 4),
+            (r >= 3) & (f >= 3) & (m >= 3),
+            (r <= 2) & ((f >= 4) | (m >= 4)),
+            (r >= 4) & (f <= 2) & (m <= 2),
+        ],
+        [0, 1, 2, 3],
+        default=4,
+    ).astype(np.int8)
+
+_SEGMENT_LUT = _segment_lookup_table()
+
+# Quintile cut points, nudged up where 0.2/0.4/... are not exact in binary, as pd.qcut does
+_QUINTILES = np.linspace(0, 1, 6)
+np.putmask(_QUINTILES, 5 * _QUINTILES != np.arange(6), np.nextafter(_QUINTILES, 1))
+
+def _quintile_scores(values, reverse=False, by_rank=False):
+    """
+    1-5 scores with the same bins as pd.qcut(values, 5), falling back to qcut on rank(method='first')
+    when the value quintiles are not distinct. Missing values get a NaN score.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    x = values[valid]
+    edges = np.quantile(x, _QUINTILES)
+    if by_rank or np.unique(edges).size < 6:
+        ranks = np.empty(x.size, dtype=np.float64)
+        ranks[np.argsort(x, kind='stable')] = np.arange(1, x.size + 1)
+        x = ranks
+        edges = np.quantile(x, _QUINTILES)
+    bins = np.searchsorted(edges[1:-1], x, side='left') + 1
+    scores = np.full(values.size, np.nan)
+    scores[valid] = 6 - bins if reverse else bins
+    return scores
+
+def _whole_days(delta):
+    """Whole days in a timedelta Series, floored like .dt.days but divided on the raw timedelta64 array."""
+    values = delta.to_numpy()
+    missing = np.isnat(values)
+    with np.errstate(invalid='ignore'):
+        days = values // np.timedelta64(1, 'D')
+    if missing.any():
+        days = np.where(missing, np.nan, days)
+    return pd.Series(days, index=delta.index)
+
+def compute_rfm(summary, reference_date=None):
     if reference_date is None:
-        reference_date = df['InvoiceDate'].max() + timedelta(days=1)
-
-    rfm = df.groupby('CustomerID').agg({
-        'InvoiceDate': lambda x: (reference_date - x.max()).days,
-        'CustomerID': 'count',
-        'TotalPrice': 'sum'
-    }).rename(columns={
-        'InvoiceDate': 'Recency',
-        'CustomerID': 'Frequency',
-        'TotalPrice': 'Monetary'
+        reference_date = summary['LastPurchase'].max() + timedelta(days=1)
+
+    rfm = pd.DataFrame({
+        'Recency': _whole_days(reference_date - summary['LastPurchase']),
+        'Frequency': summary['Frequency'],
+        'Monetary': summary['Monetary'],
     })
 
-    # Score (1-5) using quantiles
-    try:
-        rfm['R_Score'] = pd.qcut(rfm['Recency'], 5, labels=[5,4,3,2,1])
-    except:
-        rfm['R_Score'] = pd.qcut(rfm['Recency'].rank(method='first'), 5, labels=[5,4,3,2,1])
-    try:
-        rfm['F_Score'] = pd.qcut(rfm['Frequency'].rank(method='first'), 5, labels=[1,2,3,4,5])
-    except:
-        rfm['F_Score'] = pd.qcut(rfm['Frequency'].rank(method='first'), 5, labels=[1,2,3,4,5])
-    try:
-        rfm['M_Score'] = pd.qcut(rfm['Monetary'], 5, labels=[1,2,3,4,5])
-    except:
-        rfm['M_Score'] = pd.qcut(rfm['Monetary'].rank(method='first'), 5, labels=[1,2,3,4,5])
+    # Score (1-5) using quantiles; frequency is always ranked because it is mostly ties
+    rfm['R_Score'] = _quintile_scores(rfm['Recency'], reverse=True)
+    rfm['F_Score'] = _quintile_scores(rfm['Frequency'], by_rank=True)
+    rfm['M_Score'] = _quintile_scores(rfm['Monetary'])
 
     # 🚨 Drop any customers with missing scores
     rfm.dropna(subset=['R_Score', 'F_Score', 'M_Score'], inplace=True)
 
-    # ✅ Convert to integer
-    rfm['R_Score'] = rfm['R_Score'].astype(int)
-    rfm['F_Score'] = rfm['F_Score'].astype(int)
-    rfm['M_Score'] = rfm['M_Score'].astype(int)
-
-    rfm['RFM_Score'] = rfm['R_Score'].astype(str) + rfm['F_Score'].astype(str) + rfm['M_Score'].astype(str)
-
-    # Segment mapping (simplified)
-    def assign_segment(row):
-        r, f, m = row['R_Score'], row['F_Score'], row['M_Score']  # now ints
-        if r >= 4 and f >= 4 and m >= 4:
-            return 'Champions'
-        elif r >= 3 and f >= 3 and m >= 3:
-            return 'Loyal'
-        elif r <= 2 and (f >= 4 or m >= 4):
-            return 'At Risk'
-        elif r >= 4 and f <= 2 and m <= 2:
-            return 'New'
-        else:
-            return 'Others'
-    rfm['Segment'] = rfm.apply(assign_segment, axis=1)
+    # ✅ Convert to small integers
+    rfm = rfm.astype({'R_Score': np.int8, 'F_Score': np.int8, 'M_Score': np.int8})
 
-    return rfm
-    # Segment mapping (simplified)
-    def assign_segment(row):
-        r, f, m = int(row['R_Score']), int(row['F_Score']), int(row['M_Score'])
-        if r >= 4 and f >= 4 and m >= 4:
-            return 'Champions'
-        elif r >= 3 and f >= 3 and m >= 3:
-            return 'Loyal'
-        elif r <= 2 and (f >= 4 or m >= 4):
-            return 'At Risk'
-        elif r >= 4 and f <= 2 and m <= 2:
-            return 'New'
-        else:
-            return 'Others'
-    rfm['Segment'] = rfm.apply(assign_segment, axis=1)
+    r = rfm['R_Score'].to_numpy()
+    f = rfm['F_Score'].to_numpy()
+    m = rfm['M_Score'].to_numpy()
+    # Three-digit RFM key (e.g. 545) as an integer instead of concatenated strings
+    rfm['RFM_Score'] = r.astype(np.int16) * 100 + f.astype(np.int16) * 10 + m.astype(np.int16)
+
+    # Segment from the precomputed rule table: one lookup per customer instead of four rule masks
+    rfm['Segment'] = pd.Categorical.from_codes(_SEGMENT_LUT[r - 1, f - 1, m - 1], categories=SEGMENT_CATEGORIES)
 
     return rfm
 
-def process_uploaded_data(raw_df):
-    """Main function to process uploaded transaction data into customer features."""
+# Uploads are keyed on their file_id, so a rerun with the same file skips both parsing and hashing
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False)
+def process_uploaded_data(data_key, _uploaded_file):
+    """Main function to process an uploaded CSV or Parquet file of transactions into customer features."""
+    _uploaded_file.seek(0)
+    if _uploaded_file.name.lower().endswith('.parquet'):
+        raw_df = pd.read_parquet(_uploaded_file, engine='pyarrow')
+    else:
+        # Arrow's multi-threaded reader parses ISO timestamps while reading
+        raw_df = pd.read_csv(_uploaded_file, engine='pyarrow', dtype={'CustomerID': 'string'})
+    # Dates the reader did not parse are parsed while cleaning
     cleaned = clean_transaction_data(raw_df)
     if cleaned is None:
         return None
+    return _customer_features(summarize_transactions(cleaned))
 
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False)
+def process_uploaded_chunks(data_key, _uploaded_file):
+    """Like process_uploaded_data for a large CSV, read and folded into customer summaries UPLOAD_CHUNK_ROWS rows at a time."""
+    _uploaded_file.seek(0)
+    parts = []
+    for chunk in pd.read_csv(_uploaded_file, chunksize=UPLOAD_CHUNK_ROWS, dtype={'CustomerID': 'string'}):
+        cleaned = clean_transaction_data(chunk)
+        if cleaned is None:
+            return None
+        parts.append(summarize_transactions(cleaned))
+    if not parts:
+        return None
+    return _customer_features(combine_summaries(parts))
+
+def _customer_features(summary):
     # Compute RFM
-    rfm = compute_rfm(cleaned)
+    rfm = compute_rfm(summary)
 
     # Add historical LTV (same as Monetary)
     rfm['HistoricalLTV'] = rfm['Monetary']
 
     # Add tenure (days since first purchase)
-    first_purchase = cleaned.groupby('CustomerID')['InvoiceDate'].min().rename('FirstPurchase')
-    rfm = rfm.join(first_purchase)
-    ref_date = cleaned['InvoiceDate'].max()
-    rfm['TenureDays'] = (ref_date - rfm['FirstPurchase']).dt.days
-    rfm.drop('FirstPurchase', axis=1, inplace=True)
+    ref_date = summary['LastPurchase'].max()
+    rfm['TenureDays'] = _whole_days(ref_date - summary['FirstPurchase'])
 
     # Average order value
-    avg_order = cleaned.groupby('CustomerID')['TotalPrice'].mean().rename('AvgOrderValue')
-    rfm = rfm.join(avg_order)
+    rfm['AvgOrderValue'] = summary['Monetary'] / summary['Frequency']
 
     # Simple churn probability: based on recency (e.g., logistic function)
     # Here we use a simple threshold: if recency > 90 days, prob = 0.8, else scaled
-    max_recency = rfm['Recency'].max()
-    rfm['ChurnProb'] = rfm['Recency'].apply(lambda x: min(1.0, x / 180))  # linear increase
+    rfm['ChurnProb'] = np.minimum(rfm['Recency'].to_numpy() / 180, 1.0)  # linear increase
 
     # Predicted LTV (6 months): simple heuristic – historical LTV scaled by recency factor
     rfm['PredictedLTV_Next6Months'] = rfm['HistoricalLTV'] * (1 - rfm['ChurnProb'] * 0.5)
 
+    # Low-cardinality labels as categoricals, integer columns downcast
+    rfm = _downcast_customer_columns(rfm)
+    rfm['RFM_Score'] = rfm['RFM_Score'].astype('category')
+
     # Reset index to make CustomerID a column
     rfm.reset_index(inplace=True)
     rfm.rename(columns={'index': 'CustomerID'}, inplace=True)